@@ -11,115 +11,211 @@ Bars (gray/hatch, IEEE single-column):
 X-axis: ring size N = 2^{logN}
 """
 
-import os, re, glob, argparse
+import os, re, sys, glob, argparse
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import pyplot, apply_ieee_style, source_digest, outputs_current, write_stamp
 
-FRE = re.compile(r"artifacts_(\d+)_(\d+)\.csv$")  # logN, record_s
+try:  # optional: faster CSV parsing, falls back to pandas
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = pacsv = None
+
+FRE = re.compile(r"^artifacts_(\d+)_(\d+)\.csv$")  # logN, record_s
 ARTS = ["pk", "sk", "ct_q", "ct_r", "m_DB", "metadata_json"]
 
 GRAY = ["0.20", "0.35", "0.50", "0.65", "0.80", "0.90"]
 HATCH = ["", "//", "xx", "++", "..", "\\\\"]
 
+
 def figsize_ieee_single(aspect=0.75):
     w = 3.5  # inches
     return (w, w*aspect)
 
-def load_one(path):
-    df = pd.read_csv(path)
-    if set(df.columns) != {"artifact", "bytes"}:
-        raise ValueError(f"bad columns in {path}: {df.columns.tolist()}")
-    out = {}
-    for a in ARTS:
-        v = df.loc[df["artifact"] == a, "bytes"]
-        out[a] = int(v.iloc[0]) if not v.empty else np.nan
+ART_INDEX = {a.encode(): i for i, a in enumerate(ARTS)}
+
+def parse_artifacts_bytes(buf):
+    """
+    Fast path for the exact layout written by benches/artifacts_size
+    ("artifact,bytes" header, bare name,int rows). Returns a float array
+    in ARTS order, or None if buf deviates so the CSV reader can take over.
+    """
+    lines = buf.split(b"\n")
+    if lines[0].rstrip(b"\r") != b"artifact,bytes":
+        return None
+    out = np.full(len(ARTS), np.nan)
+    for line in lines[1:]:
+        line = line.rstrip(b"\r")
+        if not line:
+            continue
+        key, sep, val = line.partition(b",")
+        if not sep or not val.isdigit():
+            return None
+        i = ART_INDEX.get(key)
+        if i is not None:
+            out[i] = int(val)
     return out
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--data", default="plots/artifacts_size/data", help="input CSV folder")
-    ap.add_argument("--figdir", default="plots/artifacts_size/figures", help="figures output folder")
-    ap.add_argument("--dpi", type=int, default=300)
-    ap.add_argument("--unit", choices=["bytes","KB","MB"], default="KB")
-    args = ap.parse_args()
-
-    os.makedirs(args.figdir, exist_ok=True)
+def read_artifacts_csv(path):
+    """Return {column: values} for one artifacts CSV."""
+    if pacsv is not None:
+        tbl = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(
+            column_types={"artifact": pa.string(), "bytes": pa.int64()}))
+        return tbl.to_pydict()
+    df = pd.read_csv(path, dtype={"artifact": "string", "bytes": "int64"})
+    return {c: df[c].to_numpy() for c in df.columns}
 
-    paths = sorted(glob.glob(os.path.join(args.data, "artifacts_*.csv")))
+def load_one(path):
+    """Sizes in bytes for one CSV, as a float array in ARTS order (NaN if absent)."""
+    with open(path, "rb") as f:
+        vals = parse_artifacts_bytes(f.read())
+    if vals is not None:
+        return vals
+    cols = read_artifacts_csv(path)
+    if set(cols) != {"artifact", "bytes"}:
+        raise ValueError(f"bad columns in {path}: {list(cols)}")
+    # one pass over the rows instead of a mask per artifact
+    sizes = dict(zip(cols["artifact"], cols["bytes"]))
+    return np.array([sizes.get(a, np.nan) for a in ARTS], dtype=np.float64)
+
+def mean_by_logN(df, scale=1.0):
+    """Per-logN mean of ARTS (NaN-skipping, like groupby().mean()), times scale."""
+    keys, inv = np.unique(df["logN"].to_numpy(), return_inverse=True)
+    mat = df[ARTS].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(mat)
+    sums = np.zeros((len(keys), len(ARTS)))
+    counts = np.zeros((len(keys), len(ARTS)))
+    np.add.at(sums, inv, np.where(valid, mat, 0.0))
+    np.add.at(counts, inv, valid)
+    with np.errstate(invalid="ignore"):
+        means = sums / counts  # artifact missing for a whole ring -> NaN
+    means *= scale
+    grp = pd.DataFrame(means, columns=ARTS)
+    grp.insert(0, "logN", keys)
+    return grp
+
+def find_csvs(data_dir):
+    paths = sorted(glob.glob(os.path.join(data_dir, "artifacts_*.csv")))
     if not paths:
-        raise SystemExit(f"No CSVs found in {args.data}")
+        raise SystemExit(f"No CSVs found in {data_dir}")
+    return paths
 
-    rows = []
+def build_summary(paths, unit):
+    """Mean artifact sizes per logN (in `unit`) over the given CSVs."""
+    triples = []
+    match, basename = FRE.match, os.path.basename
     for p in paths:
-        m = FRE.search(os.path.basename(p))
+        m = match(basename(p))
         if not m:
             continue
-        logN = int(m.group(1))
-        record_s = int(m.group(2))
-        vals = load_one(p)
-        vals.update({"logN": logN, "record_s": record_s})
-        rows.append(vals)
-
-    df = pd.DataFrame(rows).sort_values(["logN", "record_s"])
-
-    # unit scale
-    scale = {"bytes":1.0, "KB":1/1024.0, "MB":1/(1024.0*1024.0)}[args.unit]
-    df_plot = df.copy()
-    for a in ARTS:
-        df_plot[a] = df_plot[a] * scale
-
-    # aggregate by logN (mean over record_s if multiple)
-    grp = df_plot.groupby("logN")[ARTS].mean().reset_index()
+        triples.append((int(m.group(1)), int(m.group(2)), p))  # logN, record_s, path
+    if not triples:
+        raise SystemExit(f"No artifacts_<logN>_<record_s>.csv files among {len(paths)} CSVs")
+
+    logNs = np.array([t[0] for t in triples], dtype=np.int64)
+    record_ss = np.array([t[1] for t in triples], dtype=np.int64)
+    art_arr = np.empty((len(triples), len(ARTS)), dtype=np.float64)
+
+    # CSV reads are IO-bound and independent -> overlap them
+    with ThreadPoolExecutor(max_workers=min(8, len(triples))) as ex:
+        for i, vals in enumerate(ex.map(load_one, [t[2] for t in triples])):
+            art_arr[i] = vals
+
+    order = np.lexsort((record_ss, logNs))
+    df = pd.DataFrame({
+        **{a: art_arr[order, i] for i, a in enumerate(ARTS)},
+        "logN": logNs[order], "record_s": record_ss[order],
+    })
+
+    # aggregate by logN (mean over record_s if multiple); the unit scale is
+    # applied once to the small aggregated matrix
+    scale = {"bytes":1.0, "KB":1/1024.0, "MB":1/(1024.0*1024.0)}[unit]
+    return mean_by_logN(df, scale)
+
+def plot_summary(grp, unit):
+    plt = pyplot()
+    from matplotlib.patches import Patch
+
     labels = [rf"$2^{{{int(x)}}}$" for x in grp["logN"].tolist()]
     x = np.arange(len(grp))
     width = 0.12
 
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-    })
+    apply_ieee_style()
 
     fig, ax = plt.subplots(figsize=figsize_ieee_single(0.80))
 
-    # grouped bars
-    for i, art in enumerate(ARTS):
-        vals = grp[art].to_numpy(dtype=float)
-        ax.bar(x + (i-2.5)*width, vals, width,
-               color=GRAY[i % len(GRAY)],
-               hatch=HATCH[i % len(HATCH)],
-               edgecolor="black", linewidth=0.5,
-               label=art)
+    # grouped bars: one ax.bar call, bars ordered artifact-major
+    data = grp[ARTS].to_numpy(dtype=np.float64)
+    K = len(ARTS)
+    xs = np.concatenate([x + (i-(K-1)/2)*width for i in range(K)])
+    styles = [(GRAY[i % len(GRAY)], HATCH[i % len(HATCH)]) for i in range(K)]
+    bars = ax.bar(xs, data.T.reshape(-1), width,
+                  color=[g for g, _ in styles for _ in x],
+                  edgecolor="black", linewidth=0.5)
+    for j, rect in enumerate(bars):
+        rect.set_hatch(styles[j // len(x)][1])
+    handles = [Patch(facecolor=g, hatch=h, edgecolor="black", linewidth=0.5, label=art)
+               for art, (g, h) in zip(ARTS, styles)]
 
     ax.set_xticks(x)
     ax.set_xticklabels(labels)
     ax.set_xlabel(r"Ring size $N$")
-    ax.set_ylabel(f"Size ({args.unit})")
+    ax.set_ylabel(f"Size ({unit})")
     ax.set_title("Artifacts size by ring configuration")
     ax.grid(axis="y", linestyle=":", linewidth=0.6, alpha=0.6)
 
     # tight legend
-    ax.legend(ncol=2, frameon=True, loc="upper left", bbox_to_anchor=(0.0, 1.03))
+    ax.legend(handles=handles, ncol=2, frameon=True, loc="upper left", bbox_to_anchor=(0.0, 1.03))
 
     fig.tight_layout()
+    return fig
 
-    out_pdf = os.path.join(args.figdir, "artifacts_sizes.pdf")
-    out_png = os.path.join(args.figdir, "artifacts_sizes.png")
-    fig.savefig(out_pdf, bbox_inches="tight")
-    fig.savefig(out_png, dpi=args.dpi, bbox_inches="tight")
+def make_figure(args):
+    """Figure only (no files written); used by ../report.py. Reads args.data, args.unit."""
+    return plot_summary(build_summary(find_csvs(args.data), args.unit), args.unit)
 
-    # summary CSV
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", default="plots/artifacts_size/data", help="input CSV folder")
+    ap.add_argument("--figdir", default="plots/artifacts_size/figures", help="figures output folder")
+    ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--formats", default="pdf", help="comma-separated list: pdf,png")
+    ap.add_argument("--unit", choices=["bytes","KB","MB"], default="KB")
+    ap.add_argument("--force", action="store_true",
+                    help="re-plot even if the inputs and options are unchanged")
+    ap.add_argument("--no-plot", action="store_true", help="only write the summary CSV")
+    args = ap.parse_args()
+
+    os.makedirs(args.figdir, exist_ok=True)
+
+    paths = find_csvs(args.data)
+
+    out_base = os.path.join(args.figdir, "artifacts_sizes")
+    formats = [fmt.strip() for fmt in args.formats.split(",")]
+    outs = [] if args.no_plot else [f"{out_base}.{fmt}" for fmt in formats]
     sum_csv = os.path.join(args.figdir, "artifacts_sizes_summary.csv")
+    stamp = f"{out_base}.hash"
+    digest = source_digest(__file__, args, paths)
+    if not args.force and outputs_current(stamp, digest, outs + [sum_csv]):
+        print(f"[OK] Up to date: {args.figdir} (use --force to re-plot)")
+        return
+
+    grp = build_summary(paths, args.unit)
+    if outs:
+        fig = plot_summary(grp, args.unit)
+        for fmt, out in zip(formats, outs):
+            fig.savefig(out, dpi=args.dpi if fmt == "png" else None)
+
+    # summary CSV
     grp.to_csv(sum_csv, index=False)
 
-    print(f"[OK] Wrote {out_pdf}")
-    print(f"[OK] Wrote {out_png}")
+    for out in outs:
+        print(f"[OK] Wrote {out}")
     print(f"[OK] Wrote {sum_csv}")
+    write_stamp(stamp, digest)
 
 if __name__ == "__main__":
     main()
@@ -15,10 +15,15 @@ Output:
 """
 
 import os
+import sys
+import csv
 import argparse
 import numpy as np
-import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import apply_ieee_style, source_digest, outputs_current, write_stamp
 
 # --- raw data (from the message) --------------------------------------
 
@@ -75,43 +80,36 @@ def figsize_ieee_single(aspect=0.75):
 GRAY = ["0.25", "0.65"]     # two greys for two bars
 HATCH = ["", "//"]          # distinct hatches for B/W print
 
-plt.rcParams.update({
-    "font.family": "sans-serif",
-    "font.size": 8,
-    "axes.labelsize": 8,
-    "axes.titlesize": 9,
-    "xtick.labelsize": 7,
-    "ytick.labelsize": 7,
-    "legend.fontsize": 7,
-})
 
 # --- core --------------------------------------------------------------
 
-def build_dataframe():
-    df = pd.DataFrame(DATA)
-    # Keep a tidy set of columns for summary
-    cols = [
-        "channel", "friendly", "logN",
-        "block_KB", "stateLevelDB_KB",
-        "m_DB_B", "bgv_params_B", "n_B", "record_s_B", "record_013_B",
-        "init_txid",
-    ]
-    return df[cols].copy()
-
-def plot_block_vs_state(df, figdir, dpi):
+# Keep a tidy set of columns for summary
+SUMMARY_COLS = [
+    "channel", "friendly", "logN",
+    "block_KB", "stateLevelDB_KB",
+    "m_DB_B", "bgv_params_B", "n_B", "record_s_B", "record_013_B",
+    "init_txid",
+]
+
+def build_rows():
+    return [{c: d[c] for c in SUMMARY_COLS} for d in DATA]
+
+def figure_block_vs_state(rows):
     # x-axis: friendly label (mini, mid, rich)
     order = ["mini", "mid", "rich"]
-    df = df.set_index("friendly").loc[[x for x in order if x in df["friendly"].values]]
-    xlabels = df.index.tolist()
+    by_name = {r["friendly"]: r for r in rows}
+    rows = [by_name[o] for o in order if o in by_name]
+    xlabels = [r["friendly"] for r in rows]
     x = np.arange(len(xlabels))
     width = 0.35
 
+    apply_ieee_style()
     fig, ax = plt.subplots(figsize=figsize_ieee_single(0.80))
 
-    ax.bar(x - width/2, df["block_KB"].to_numpy(dtype=float), width,
+    ax.bar(x - width/2, np.array([r["block_KB"] for r in rows], dtype=float), width,
            color=GRAY[0], hatch=HATCH[0], edgecolor="black", linewidth=0.5,
            label="Block size (KB)")
-    ax.bar(x + width/2, df["stateLevelDB_KB"].to_numpy(dtype=float), width,
+    ax.bar(x + width/2, np.array([r["stateLevelDB_KB"] for r in rows], dtype=float), width,
            color=GRAY[1], hatch=HATCH[1], edgecolor="black", linewidth=0.5,
            label="World state LevelDB (KB)")
 
@@ -124,26 +122,50 @@ def plot_block_vs_state(df, figdir, dpi):
     ax.legend(frameon=True, loc="upper left", bbox_to_anchor=(0.0, 1.02), ncol=1)
 
     fig.tight_layout()
+    return fig
+
+def make_figure(args):
+    """Figure only (no files written); used by ../report.py."""
+    return figure_block_vs_state(build_rows())
+
+def plot_block_vs_state(rows, figdir, dpi, formats="pdf"):
+    fig = figure_block_vs_state(rows)
     os.makedirs(figdir, exist_ok=True)
-    fig.savefig(os.path.join(figdir, "block_vs_worldstate_bw.pdf"), bbox_inches="tight")
-    fig.savefig(os.path.join(figdir, "block_vs_worldstate_bw.png"), dpi=dpi, bbox_inches="tight")
-    print(f"[OK] Wrote: {os.path.join(figdir, 'block_vs_worldstate_bw.pdf')}")
+    for fmt in formats.split(","):
+        fmt = fmt.strip()
+        out = os.path.join(figdir, f"block_vs_worldstate_bw.{fmt}")
+        fig.savefig(out, dpi=dpi if fmt == "png" else None)
+        print(f"[OK] Wrote: {out}")
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--figdir", default="plots/block_vs_worldstate/figures", help="output folder for figures/summary")
     ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--formats", default="pdf", help="comma-separated list: pdf,png")
+    ap.add_argument("--force", action="store_true", help="re-plot even if DATA and options are unchanged")
     args = ap.parse_args()
 
-    df = build_dataframe()
+    sum_csv = os.path.join(args.figdir, "block_vs_worldstate_summary.csv")
+    stamp = os.path.join(args.figdir, "block_vs_worldstate_bw.hash")
+    outs = [sum_csv] + [os.path.join(args.figdir, f"block_vs_worldstate_bw.{fmt.strip()}")
+                        for fmt in args.formats.split(",")]
+    digest = source_digest(__file__, args)
+    if not args.force and outputs_current(stamp, digest, outs):
+        print(f"[OK] Up to date: {args.figdir} (use --force to re-plot)")
+        return
+
+    rows = build_rows()
 
     # write summary CSV (also includes the per-key GetState sizes you listed)
     os.makedirs(args.figdir, exist_ok=True)
-    sum_csv = os.path.join(args.figdir, "block_vs_worldstate_summary.csv")
-    df.to_csv(sum_csv, index=False)
+    with open(sum_csv, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=SUMMARY_COLS, lineterminator="\n")
+        w.writeheader()
+        w.writerows(rows)
     print(f"[OK] Wrote: {sum_csv}")
 
-    plot_block_vs_state(df, args.figdir, args.dpi)
+    plot_block_vs_state(rows, args.figdir, args.dpi, args.formats)
+    write_stamp(stamp, digest)
 
 if __name__ == "__main__":
     main()
@@ -7,7 +7,11 @@ Version 3 — merges bgv_params, n, and record_s into 'metadata'
 and adds configurable Y-axis upper limits.
 """
 
-import os, argparse, numpy as np, pandas as pd, matplotlib.pyplot as plt
+import os, sys, csv, argparse, numpy as np, matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import apply_ieee_style, source_digest, outputs_current, write_stamp
 
 # ---------------- Raw data ----------------
 DATA = [
@@ -61,13 +65,6 @@ PALETTE = [
     ("overhead_B", "0.90", "\\\\"),
 ]
 
-plt.rcParams.update({
-    "font.family": "sans-serif", "font.size": 8,
-    "axes.labelsize": 8, "axes.titlesize": 9,
-    "xtick.labelsize": 7, "ytick.labelsize": 7,
-    "legend.fontsize": 7,
-})
-
 def bytes_from_kb(kb): return float(kb) * 1000
 def clamp(x): return x if x > 0 else 0
 
@@ -75,7 +72,7 @@ def parse_records(chan):
     try: return int(chan.split("_")[1])
     except: return np.nan
 
-def build_dataframe():
+def build_rows():
     rows = []
     for d in DATA:
         nrec = parse_records(d["channel"])
@@ -93,72 +90,97 @@ def build_dataframe():
             "overhead_ws_B": clamp(ws_total_B - known_B),
             "block_total_B": block_total_B, "ws_total_B": ws_total_B,
         })
-    return pd.DataFrame(rows)
-
-def to_kb(df, cols):
-    out = df.copy()
-    for c in cols: out[c] = out[c]/1000
-    return out
+    return rows
 
 # ---------------- Plot ----------------
-def plot_stacked(ax, df, title, ylabel, overhead_col, ylim_top=None):
+def plot_stacked(ax, rows, title, ylabel, overhead_col, ylim_top=None):
     order = ["mini", "mid", "rich"]
-    df = df.set_index("friendly").loc[[x for x in order if x in df["friendly"].values]].reset_index()
-    x = np.arange(len(df)); width = 0.55
+    by_name = {r["friendly"]:r for r in rows}
+    rows = [by_name[o] for o in order if o in by_name]
+    x = np.arange(len(rows)); width = 0.55
     stack_cols, colors, hatches, labels = [], [], [], []
     for k,g,h in PALETTE:
         col = overhead_col if k=="overhead_B" else k
-        if col not in df.columns: continue
+        if col not in rows[0]: continue
         stack_cols.append(col); colors.append(g); hatches.append(h)
         labels.append({"m_DB_B":"m_DB","metadata_B":"metadata",
                        "json_est_B":"json (est.)",
                        "overhead_block_B":"overhead","overhead_ws_B":"overhead"}[col])
-    dfp = to_kb(df, stack_cols); bottom=np.zeros(len(x))
-    for col,color,hatch,lab in zip(stack_cols,colors,hatches,labels):
-        vals=dfp[col].to_numpy()
-        ax.bar(x,vals,width,bottom=bottom,color=color,hatch=hatch,
+    M = np.array([[r[c] for c in stack_cols] for r in rows], dtype=float)/1000  # KB; rows=channels, cols=layers
+    bottoms = np.hstack([np.zeros((len(x),1)), np.cumsum(M,axis=1)[:,:-1]])
+    for i,(color,hatch,lab) in enumerate(zip(colors,hatches,labels)):
+        ax.bar(x,M[:,i],width,bottom=bottoms[:,i],color=color,hatch=hatch,
                edgecolor="black",linewidth=0.5,label=lab)
-        bottom+=vals
-    ax.set_xticks(x); ax.set_xticklabels(df["friendly"])
+    ax.set_xticks(x); ax.set_xticklabels([r["friendly"] for r in rows])
     ax.set_xlabel("Channel (mini, mid, rich)")
     ax.set_ylabel(ylabel); ax.set_title(title)
     ax.grid(axis="y",linestyle=":",linewidth=0.6,alpha=0.6)
     if ylim_top: ax.set_ylim(0, ylim_top)
     ax.legend(ncol=2,frameon=True,loc="upper left",bbox_to_anchor=(0.0,1.03))
 
-def save_fig(fig,figdir,name,dpi):
-    os.makedirs(figdir,exist_ok=True)
+# panel -> (output name, title, overhead column, ylim option)
+PANELS = {
+    "block": ("blockchan_components_bw_v3","Block size breakdown by channel",
+              "overhead_block_B","ylim_block"),
+    "ws": ("worldstate_components_bw_v3","World-state (LevelDB) breakdown by channel",
+           "overhead_ws_B","ylim_ws"),
+}
+
+def make_figure(args, panel="block"):
+    """One panel as its own Figure (no files written); used by ../report.py."""
+    _,title,col,ylim=PANELS[panel]
+    apply_ieee_style()
+    fig,ax=plt.subplots(figsize=figsize_ieee_single(0.80))
+    plot_stacked(ax,build_rows(),title,"Size (KB)",col,ylim_top=getattr(args,ylim,None))
     fig.tight_layout()
-    fig.savefig(os.path.join(figdir,f"{name}.pdf"),bbox_inches="tight")
-    fig.savefig(os.path.join(figdir,f"{name}.png"),dpi=dpi,bbox_inches="tight")
+    return fig
+
+def save_fig(fig,figdir,name,dpi,formats="pdf"):
+    os.makedirs(figdir,exist_ok=True)
+    fig.tight_layout()  # every panel: the figure is reused, margins must follow its labels
+    for fmt in formats.split(","):
+        fmt=fmt.strip()
+        fig.savefig(os.path.join(figdir,f"{name}.{fmt}"),dpi=dpi if fmt=="png" else None)
     print(f"[OK] Wrote {name}.*")
 
 def main():
     ap=argparse.ArgumentParser()
     ap.add_argument("--figdir",default="plots/block_vs_worldstate/figures")
     ap.add_argument("--dpi",type=int,default=300)
+    ap.add_argument("--formats",default="pdf",help="comma-separated list: pdf,png")
     ap.add_argument("--ylim_block",type=float,default=None,help="set Y-axis top limit for block plot (KB)")
     ap.add_argument("--ylim_ws",type=float,default=None,help="set Y-axis top limit for world-state plot (KB)")
+    ap.add_argument("--force",action="store_true",help="re-plot even if DATA and options are unchanged")
     args=ap.parse_args()
 
-    df=build_dataframe()
-    csv=os.path.join(args.figdir,"block_worldstate_components_summary_v3.csv")
+    sum_csv=os.path.join(args.figdir,"block_worldstate_components_summary_v3.csv")
+    stamp=os.path.join(args.figdir,"block_worldstate_components_v3.hash")
+    outs=[sum_csv]+[os.path.join(args.figdir,f"{name}.{fmt.strip()}")
+                for name,*_ in PANELS.values()
+                for fmt in args.formats.split(",")]
+    digest=source_digest(__file__,args)
+    if not args.force and outputs_current(stamp,digest,outs):
+        print(f"[OK] Up to date: {args.figdir} (use --force to re-plot)"); return
+
+    rows=build_rows()
     os.makedirs(args.figdir,exist_ok=True)
-    df_out=df.copy()
-    for c in ["m_DB_B","metadata_B","json_est_B","overhead_block_B",
-              "overhead_ws_B","block_total_B","ws_total_B"]:
-        df_out[c.replace("_B","_KB")]=df_out[c]/1000; del df_out[c]
-    df_out.to_csv(csv,index=False); print(f"[OK] Wrote {csv}")
-
-    fig1,ax1=plt.subplots(figsize=figsize_ieee_single(0.80))
-    plot_stacked(ax1,df,"Block size breakdown by channel","Size (KB)",
-                 "overhead_block_B",ylim_top=args.ylim_block)
-    save_fig(fig1,args.figdir,"blockchan_components_bw_v3",args.dpi)
-
-    fig2,ax2=plt.subplots(figsize=figsize_ieee_single(0.80))
-    plot_stacked(ax2,df,"World-state (LevelDB) breakdown by channel","Size (KB)",
-                 "overhead_ws_B",ylim_top=args.ylim_ws)
-    save_fig(fig2,args.figdir,"worldstate_components_bw_v3",args.dpi)
+    kb_cols=["m_DB_B","metadata_B","json_est_B","overhead_block_B",
+             "overhead_ws_B","block_total_B","ws_total_B"]
+    rows_out=[{**{k:v for k,v in r.items() if k not in kb_cols},
+               **{c.replace("_B","_KB"):r[c]/1000 for c in kb_cols}} for r in rows]
+    with open(sum_csv,"w",newline="") as f:
+        w=csv.DictWriter(f,fieldnames=list(rows_out[0]),lineterminator="\n"); w.writeheader(); w.writerows(rows_out)
+    print(f"[OK] Wrote {sum_csv}")
+
+    apply_ieee_style()
+    # one Figure for both panels: they ship as separate single-column files,
+    # so clear and redraw the axes instead of allocating a second Figure
+    fig,ax=plt.subplots(figsize=figsize_ieee_single(0.80))
+    for name,title,col,ylim in PANELS.values():
+        ax.cla()
+        plot_stacked(ax,rows,title,"Size (KB)",col,ylim_top=getattr(args,ylim))
+        save_fig(fig,args.figdir,name,args.dpi,args.formats)
+    write_stamp(stamp,digest)
 
 if __name__=="__main__":
     main()
@@ -2,11 +2,13 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
 import glob
 import argparse
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import pyplot, apply_ieee_style, source_digest, outputs_current, write_stamp
 
 # Order & display names (now using PIRQuery)
 # tuple: (Legend Label, (subfolder, [possible csv filenames in order of preference]))
@@ -20,63 +22,66 @@ FUNCS = [
 GRAY = ["0.25", "0.55", "0.75"]
 HATCH = ["", "//", "xx"]
 
+
 def figsize_ieee_single(aspect=0.75):
     w = 3.5
     return (w, w*aspect)
 
 def avg_exec_time(csv_path: str) -> float:
-    if not os.path.exists(csv_path):
-        return np.nan
+    """Mean execution_time_ms of one CSV; raises FileNotFoundError if absent."""
     try:
-        df = pd.read_csv(csv_path)
+        # parse only the execution_time_ms column (case/whitespace tolerant)
+        df = pd.read_csv(csv_path, usecols=lambda c: c.strip().lower() == "execution_time_ms")
+    except FileNotFoundError:
+        raise
     except Exception:
         return np.nan
-    # find the execution_time_ms column (case/whitespace tolerant)
-    col = None
-    for c in df.columns:
-        if c.strip().lower() == "execution_time_ms":
-            col = c
-            break
-    if col is None:
+    if df.shape[1] == 0:
         return np.nan
-    s = pd.to_numeric(df[col], errors="coerce").dropna()
-    return float(s.mean()) if not s.empty else np.nan
+    # unparsable cells become NaN
+    arr = pd.to_numeric(df.iloc[:, 0], errors="coerce").to_numpy(dtype=float)
+    arr = arr[~np.isnan(arr)]
+    return float(arr.mean()) if arr.size else np.nan
 
 def avg_exec_time_first_existing(basedir: str, candidates: list[str]) -> float:
     for fname in candidates:
-        path = os.path.join(basedir, fname)
-        if os.path.exists(path):
-            val = avg_exec_time(path)
-            if not np.isnan(val):
-                return val
+        try:
+            val = avg_exec_time(os.path.join(basedir, fname))
+        except FileNotFoundError:
+            continue
+        if not np.isnan(val):
+            return val
     return np.nan
 
 def find_channel_dirs(root: str):
     chans = []
-    for path in glob.glob(os.path.join(root, "*_*_*")):
-        if not os.path.isdir(path):
-            continue
-        base = os.path.basename(path.rstrip("/\\"))
-        parts = base.split("_")
-        if len(parts) != 3:
-            continue
-        try:
-            logN, n, rec = map(int, parts)
-        except ValueError:
-            continue
-        chans.append((base, path, logN, n, rec))
+    # scandir yields is_dir() from the dirent, no extra stat per entry
+    try:
+        it = os.scandir(root)
+    except (FileNotFoundError, NotADirectoryError):
+        return chans  # bad --root: the caller reports that nothing was found
+    with it:
+        for entry in it:
+            if not entry.is_dir():
+                continue
+            parts = entry.name.split("_")
+            if len(parts) != 3:
+                continue
+            try:
+                logN, n, rec = map(int, parts)
+            except ValueError:
+                continue
+            chans.append((entry.name, entry.path, logN, n, rec))
     return sorted(chans, key=lambda t: t[2])  # sort by logN
 
 def collect_rows(root: str):
     rows = []
     for chan, path, logN, n, rec in find_channel_dirs(root):
         vals = {"channel": chan, "logN": logN, "n": n, "record_s": rec}
+        # one listing per channel, matched case-insensitively below
+        entries = {e.lower(): os.path.join(path, e) for e in os.listdir(path)}
         for label, (sub, fnames) in FUNCS:
-            subdir = None
-            for entry in os.listdir(path):
-                if entry.lower() == sub.lower():
-                    subdir = os.path.join(path, entry)
-                    break
+            subdir = entries.get(sub.lower())
             if not subdir:
                 vals[label] = np.nan
                 continue
@@ -84,9 +89,11 @@ def collect_rows(root: str):
         rows.append(vals)
     return pd.DataFrame(rows)
 
-def make_plot(df: pd.DataFrame, figdir: str, dpi: int):
+def plot_timings(df: pd.DataFrame):
     if df.empty:
         raise SystemExit("No timing data found.")
+    plt = pyplot()
+    from matplotlib.patches import Patch
     # Label map from numeric folder to friendly names
     label_map = {
         "13_64_128": "mini",
@@ -99,26 +106,22 @@ def make_plot(df: pd.DataFrame, figdir: str, dpi: int):
     x = np.arange(len(xlabels))
     width = 0.25
 
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-    })
+    apply_ieee_style()
 
     fig, ax = plt.subplots(figsize=figsize_ieee_single(0.8))
 
-    for i, func in enumerate(funcs):
-        y = df[func].to_numpy(dtype=float)
-        ax.bar(x + (i - (len(funcs)-1)/2)*width,
-               y, width,
-               color=GRAY[i % len(GRAY)],
-               hatch=HATCH[i % len(HATCH)],
-               edgecolor="black", linewidth=0.5,
-               label=func)
+    data = df[funcs].to_numpy(dtype=np.float64)
+    K = len(funcs)
+    # all groups in one ax.bar call; per-bar style is set afterwards
+    xs = np.concatenate([x + (i - (K-1)/2)*width for i in range(K)])
+    styles = [(GRAY[i % len(GRAY)], HATCH[i % len(HATCH)]) for i in range(K)]
+    bars = ax.bar(xs, data.T.reshape(-1), width,
+                  color=[g for g, _ in styles for _ in x],
+                  edgecolor="black", linewidth=0.5)
+    for j, rect in enumerate(bars):
+        rect.set_hatch(styles[j // len(x)][1])
+    handles = [Patch(facecolor=g, hatch=h, edgecolor="black", linewidth=0.5, label=func)
+               for func, (g, h) in zip(funcs, styles)]
 
     ax.set_xticks(x)
     ax.set_xticklabels(xlabels)
@@ -126,12 +129,22 @@ def make_plot(df: pd.DataFrame, figdir: str, dpi: int):
     ax.set_ylabel("Execution time (ms)")
     ax.set_title("Execution time of chaincode functions per channel (server-side avg)")
     ax.grid(axis="y", linestyle=":", linewidth=0.6, alpha=0.6)
-    ax.legend(ncol=1, frameon=True, loc="upper left", bbox_to_anchor=(0.0, 1.02))
+    ax.legend(handles=handles, ncol=1, frameon=True, loc="upper left", bbox_to_anchor=(0.0, 1.02))
     fig.tight_layout()
+    return fig
+
+def make_figure(args):
+    """Figure only (no files written); used by ../report.py. Reads args.root."""
+    return plot_timings(collect_rows(args.root))
 
+def make_plot(df: pd.DataFrame, figdir: str, dpi: int, formats: str = "pdf"):
+    fig = plot_timings(df)
     os.makedirs(figdir, exist_ok=True)
-    fig.savefig(os.path.join(figdir, "chaincode_timings_bw.pdf"), bbox_inches="tight")
-    fig.savefig(os.path.join(figdir, "chaincode_timings_bw.png"), dpi=dpi, bbox_inches="tight")
+    for fmt in formats.split(","):
+        fmt = fmt.strip()
+        # the title is wider than the 3.5" column; tight bbox keeps it uncropped
+        fig.savefig(os.path.join(figdir, f"chaincode_timings_bw.{fmt}"),
+                    dpi=dpi if fmt == "png" else None, bbox_inches="tight")
     print(f"[OK] Wrote greyscale plot to", figdir)
 
 def main():
@@ -139,12 +152,31 @@ def main():
     ap.add_argument("--root", default=".", help="folder containing channel folders")
     ap.add_argument("--figdir", default="figures", help="output folder for figures")
     ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--formats", default="pdf", help="comma-separated list: pdf,png")
+    ap.add_argument("--force", action="store_true", help="re-plot even if the inputs and options are unchanged")
+    ap.add_argument("--no-plot", action="store_true", help="only write the summary CSV")
     args = ap.parse_args()
 
+    sum_csv = os.path.join(args.figdir, "chaincode_timings_summary.csv")
+    inputs = glob.glob(os.path.join(args.root, "*_*_*", "*", "*_server_timing.csv"))
+    stamp = os.path.join(args.figdir, "chaincode_timings_bw.hash")
+    outs = [sum_csv]
+    if not args.no_plot:
+        outs += [os.path.join(args.figdir, f"chaincode_timings_bw.{fmt.strip()}")
+                 for fmt in args.formats.split(",")]
+    digest = source_digest(__file__, args, inputs)
+    if not args.force and inputs and outputs_current(stamp, digest, outs):
+        print(f"[OK] Up to date: {args.figdir} (use --force to re-plot)")
+        return
+
     df = collect_rows(args.root)
     os.makedirs(args.figdir, exist_ok=True)
-    df.to_csv(os.path.join(args.figdir, "chaincode_timings_summary.csv"), index=False)
-    make_plot(df, args.figdir, args.dpi)
+    df.to_csv(sum_csv, index=False)
+    if args.no_plot:
+        print(f"[OK] Wrote {sum_csv}")
+    else:
+        make_plot(df, args.figdir, args.dpi, args.formats)
+    write_stamp(stamp, digest)
 
 if __name__ == "__main__":
     main()
@@ -3,11 +3,23 @@
 
 import os
 import re
-import glob
+import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import apply_ieee_style
+
+try:  # optional: multi-threaded Arrow CSV parser, else pandas' C engine
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 
 # ======= Config =======
 # channels → friendly labels
@@ -39,34 +51,42 @@ _UNITS = {
     "kib": 1024, "mib": 1024**2, "gib": 1024**3, "tib": 1024**4,
 }
 
-def _to_bytes(token: str) -> float:
-    s = token.strip()
-    m = re.match(r"^\s*([0-9]*\.?[0-9]+)\s*([A-Za-z]+)\s*$", s)
-    if not m:
-        try: return float(s)
-        except Exception: return np.nan
-    val = float(m.group(1))
-    unit = m.group(2).lower()
-    unit = {"kb":"kb", "mb":"mb", "gb":"gb", "b":"b"}.get(unit, unit)
-    factor = _UNITS.get(unit)
-    if factor is None:
-        unit2 = unit.rstrip("b")
-        factor = _UNITS.get(unit2 + "b", 1)
-    return val * factor
-
-def _parse_pair_bytes(field: str):
-    if not isinstance(field, str) or "/" not in field:
-        return (np.nan, np.nan)
-    a, b = field.split("/", 1)
-    return _to_bytes(a), _to_bytes(b)
+_UNITS_SERIES = pd.Series(_UNITS, dtype=float)
+_TOKEN_RE = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*([A-Za-z]+)\s*$")
+
+def _to_bytes_vec(tokens: pd.Series) -> np.ndarray:
+    """Vectorized "12.3MiB" -> bytes; bare numbers pass through, junk -> NaN."""
+    parts = tokens.str.extract(_TOKEN_RE)
+    unit = parts[1].str.lower()
+    # unknown unit: retry as "<unit>b" (e.g. "k" -> "kb"), else factor 1
+    factor = (unit.map(_UNITS_SERIES)
+                  .fillna((unit.str.rstrip("b") + "b").map(_UNITS_SERIES))
+                  .fillna(1.0))
+    out = pd.to_numeric(parts[0], errors="coerce") * factor
+    bare = parts[0].isna()
+    if bare.any():
+        out[bare] = pd.to_numeric(tokens[bare].str.strip(), errors="coerce")
+    return out.to_numpy(dtype=float)
+
+def _parse_pair_bytes_vec(series: pd.Series):
+    """Split "a / b" cells and convert both sides; cells without "/" -> NaN."""
+    parts = series.astype(str).str.partition("/")
+    has_pair = (parts[1] == "/").to_numpy()
+    a = np.where(has_pair, _to_bytes_vec(parts[0]), np.nan)
+    b = np.where(has_pair, _to_bytes_vec(parts[2]), np.nan)
+    return a, b
+
+# text columns are parsed by the helpers below; epoch is left to inference
+# so that a junk value is coerced to NaN instead of failing the whole file
+_DTYPES = {c: "string" for c in
+           ["CONTAINER", "CPU %", "MEM USAGE / LIMIT", "MEM %", "NET I/O", "BLOCK I/O"]}
 
 def _pct(s: str) -> float:
     try: return float(str(s).strip().rstrip("%"))
     except Exception: return np.nan
 
 def _normalize_df(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    out.rename(columns={c: c.strip() for c in out.columns}, inplace=True)
+    out = df.rename(columns={c: c.strip() for c in df.columns})  # new frame, no full copy
     needed = ["epoch", "CONTAINER", "CPU %", "MEM USAGE / LIMIT", "MEM %", "NET I/O", "BLOCK I/O"]
     missing = [c for c in needed if c not in out.columns]
     if missing:
@@ -76,17 +96,9 @@ def _normalize_df(df: pd.DataFrame) -> pd.DataFrame:
     out["CPU_pct"] = out["CPU %"].map(_pct)
     out["MEM_pct"] = out["MEM %"].map(_pct)
 
-    u_l = out["MEM USAGE / LIMIT"].astype(str).map(_parse_pair_bytes)
-    out["MEM_usage_B"] = u_l.map(lambda x: x[0])
-    out["MEM_limit_B"] = u_l.map(lambda x: x[1])
-
-    net = out["NET I/O"].astype(str).map(_parse_pair_bytes)
-    out["NET_in_B_snap"]  = net.map(lambda x: x[0])
-    out["NET_out_B_snap"] = net.map(lambda x: x[1])
-
-    blk = out["BLOCK I/O"].astype(str).map(_parse_pair_bytes)
-    out["BLK_in_B_snap"]  = blk.map(lambda x: x[0])
-    out["BLK_out_B_snap"] = blk.map(lambda x: x[1])
+    out["MEM_usage_B"], out["MEM_limit_B"] = _parse_pair_bytes_vec(out["MEM USAGE / LIMIT"])
+    out["NET_in_B_snap"], out["NET_out_B_snap"] = _parse_pair_bytes_vec(out["NET I/O"])
+    out["BLK_in_B_snap"], out["BLK_out_B_snap"] = _parse_pair_bytes_vec(out["BLOCK I/O"])
 
     return out[[
         "epoch","CONTAINER","CPU_pct","MEM_pct",
@@ -95,55 +107,107 @@ def _normalize_df(df: pd.DataFrame) -> pd.DataFrame:
         "BLK_in_B_snap","BLK_out_B_snap"
     ]].dropna(subset=["epoch","CONTAINER"])
 
+SNAP_COLS  = ["NET_in_B_snap","NET_out_B_snap","BLK_in_B_snap","BLK_out_B_snap"]
+DELTA_COLS = [c.replace("_snap","_delta") for c in SNAP_COLS]
+
 def _deltas_by_container_subset(df_norm: pd.DataFrame) -> pd.DataFrame:
     """
     Convert cumulative NET/BLOCK snapshots to per-epoch deltas
     keeping groups by (CONTAINER, subset).
     """
-    frames = []
-    for (cont, subset), g in df_norm.groupby(["CONTAINER", "subset"], sort=False):
-        g = g.sort_values("epoch").copy()
-        for col in ["NET_in_B_snap","NET_out_B_snap","BLK_in_B_snap","BLK_out_B_snap"]:
-            g[col.replace("_snap","_delta")] = g[col].diff()
-        frames.append(g)
-    out = pd.concat(frames, ignore_index=True)
-    for col in ["NET_in_B_delta","NET_out_B_delta","BLK_in_B_delta","BLK_out_B_delta"]:
-        out[col] = out[col].where(out[col] >= 0, np.nan)
+    # one stable sort: groups in order of first appearance, epochs ascending
+    keys = ["CONTAINER", "subset"]
+    codes = df_norm.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+    order = np.lexsort((df_norm["epoch"].to_numpy(), codes))
+    out = df_norm.iloc[order].reset_index(drop=True)
+    # grouped diff: NaN on each group's first row; counter resets -> NaN
+    deltas = out.groupby(keys, sort=False, observed=True)[SNAP_COLS].diff()
+    out[DELTA_COLS] = deltas.where(deltas >= 0).to_numpy()
     # drop first rows per (container, subset) where deltas NaN
-    out = out.dropna(subset=["NET_in_B_delta","NET_out_B_delta","BLK_in_B_delta","BLK_out_B_delta"], how="all")
+    out = out.dropna(subset=DELTA_COLS, how="all")
     return out
 
 # ======= data collection =======
 def find_channel_dirs(root: str):
     chans = []
-    for path in glob.glob(os.path.join(root, "*_*_*")):
-        if not os.path.isdir(path): continue
-        base = os.path.basename(path.rstrip("/\\"))
-        parts = base.split("_")
-        if len(parts) != 3: continue
+    try:
+        it = os.scandir(root)
+    except (FileNotFoundError, NotADirectoryError):
+        return chans  # bad --root: the caller reports that nothing was found
+    with it:
+        for entry in it:
+            if not entry.is_dir(): continue
+            parts = entry.name.split("_")
+            if len(parts) != 3: continue
+            try:
+                logN, n, rec = map(int, parts)
+            except ValueError:
+                continue
+            chans.append((entry.name, entry.path, logN))
+    return sorted(chans, key=lambda t: t[2])
+
+def _load_normalized(csv_path: str) -> pd.DataFrame:
+    """
+    _normalize_df of one docker_stats.csv, cached in a parquet sidecar
+    (<csv>.parquet) that is reused while newer than the CSV and this script.
+    """
+    cache = csv_path + ".parquet"
+    try:
+        if os.path.getmtime(cache) >= max(os.path.getmtime(csv_path), os.path.getmtime(__file__)):
+            return pd.read_parquet(cache)
+    except Exception:
+        pass  # no cache yet, no parquet engine, or an unreadable sidecar: re-parse
+    norm = _normalize_df(pd.read_csv(csv_path, engine=CSV_ENGINE, dtype=_DTYPES))
+    try:
+        norm.to_parquet(cache, compression="zstd")
+    except Exception:
+        # read-only dir, no parquet engine, Arrow rejecting a dtype...: the
+        # cache is optional, so never lose the parsed frame over it
         try:
-            logN, n, rec = map(int, parts)
-        except ValueError:
+            os.remove(cache)  # no half-written sidecar for the next run
+        except OSError:
+            pass
+    return norm
+
+def _stack_frames(frames, subset_codes) -> pd.DataFrame:
+    """
+    Concatenate normalized per-function frames into pre-sized column arrays.
+    CONTAINER and subset come out as categoricals directly: the function
+    label is never materialized as a per-row string column.
+    """
+    sizes = [len(f) for f in frames]
+    total = sum(sizes)
+    out = {}
+    for col in frames[0].columns:
+        if col == "CONTAINER":
             continue
-        chans.append((base, path, logN))
-    return sorted(chans, key=lambda t: t[2])
+        buf = np.empty(total, dtype=np.result_type(*(f[col].dtype for f in frames)))
+        off = 0
+        for f, n in zip(frames, sizes):
+            buf[off:off + n] = f[col].to_numpy()
+            off += n
+        out[col] = buf
+    # a handful of labels repeated over every row: group/filter on int codes
+    out["CONTAINER"] = union_categoricals([pd.Categorical(f["CONTAINER"]) for f in frames],
+                                          sort_categories=True)
+    out["subset"] = pd.Categorical.from_codes(np.repeat(subset_codes, sizes),
+                                              categories=[lbl for _, lbl in SUBSETS])
+    return pd.DataFrame(out, columns=[*frames[0].columns, "subset"])
 
 def load_all_stats_for_channel(chan_path: str) -> pd.DataFrame:
-    frames = []
-    for subdir, label in SUBSETS:
+    frames, subset_codes = [], []
+    for code, (subdir, _label) in enumerate(SUBSETS):
         csv_path = os.path.join(chan_path, subdir, "docker_stats.csv")
         if not os.path.exists(csv_path):
             continue
         try:
-            raw = pd.read_csv(csv_path)
-            norm = _normalize_df(raw)
-            norm["subset"] = label  # store the function name
-            frames.append(norm)
+            frames.append(_load_normalized(csv_path))
+            subset_codes.append(code)  # the function name, as a SUBSETS index
         except Exception:
             continue
     if not frames:
         return pd.DataFrame()
-    return pd.concat(frames, ignore_index=True)
+    return _stack_frames(frames, subset_codes)
 
 def summarize_peer0_by_function(chan_name: str, chan_path: str) -> pd.DataFrame:
     """
@@ -154,8 +218,11 @@ def summarize_peer0_by_function(chan_name: str, chan_path: str) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame()
 
-    # filter to peer0 only (case-insensitive contains 'peer0')
-    df = df[df["CONTAINER"].str.contains("peer0", case=False, na=False)].copy()
+    # filter to peer0 only (case-insensitive contains 'peer0'); the match runs
+    # on the few category labels, rows are then selected by integer code
+    cats = df["CONTAINER"].cat.categories
+    peer_codes = np.flatnonzero(cats.str.contains("peer0", case=False))
+    df = df[np.isin(df["CONTAINER"].cat.codes.to_numpy(), peer_codes)]
     if df.empty:
         return pd.DataFrame()
 
@@ -163,7 +230,7 @@ def summarize_peer0_by_function(chan_name: str, chan_path: str) -> pd.DataFrame:
 
     # CPU/MEM means per function
     cpu_mem = (
-        df.groupby("subset", as_index=False)
+        df.groupby("subset", as_index=False, observed=True)
           .agg(CPU_pct=("CPU_pct","mean"),
                MEM_pct=("MEM_pct","mean"))
     )
@@ -175,9 +242,9 @@ def summarize_peer0_by_function(chan_name: str, chan_path: str) -> pd.DataFrame:
         df_d["NET_sum"] = df_d["NET_in_B_delta"].fillna(0) + df_d["NET_out_B_delta"].fillna(0)
         df_d["BLK_sum"] = df_d["BLK_in_B_delta"].fillna(0) + df_d["BLK_out_B_delta"].fillna(0)
         io = (
-            df_d.groupby("subset", as_index=False)
-                .agg(NET_KB=("NET_sum", lambda s: float(s.mean())/1024.0 if len(s) else np.nan),
-                     BLK_KB=("BLK_sum", lambda s: float(s.mean())/1024.0 if len(s) else np.nan))
+            (df_d.groupby("subset", observed=True)[["NET_sum","BLK_sum"]].mean() / 1024.0)
+                .rename(columns={"NET_sum":"NET_KB", "BLK_sum":"BLK_KB"})
+                .reset_index()
         )
     else:
         io = pd.DataFrame({"subset": cpu_mem["subset"].values, "NET_KB": np.nan, "BLK_KB": np.nan})
@@ -188,6 +255,10 @@ def summarize_peer0_by_function(chan_name: str, chan_path: str) -> pd.DataFrame:
     out["CONTAINER"] = "peer0"
     return out[["channel","friendly","subset","CONTAINER","CPU_pct","MEM_pct","NET_KB","BLK_KB"]]
 
+def _summarize_worker(chan) -> pd.DataFrame:
+    chan_name, chan_path, _logN = chan
+    return summarize_peer0_by_function(chan_name, chan_path)
+
 # ======= plotting =======
 def _bar_funcs_peer(ax, df, metric, title, ylabel):
     """
@@ -197,13 +268,10 @@ def _bar_funcs_peer(ax, df, metric, title, ylabel):
     channels = df["friendly"].unique().tolist()
     funcs = [lbl for (_, lbl) in SUBSETS]  # ordered: InitLedger, GetMetadata, PIRQuery
 
-    # build matrix [len(funcs) x len(channels)]
-    mat = np.full((len(funcs), len(channels)), np.nan, dtype=float)
-    for j, ch in enumerate(channels):
-        sub = df[df["friendly"] == ch]
-        for i, f in enumerate(funcs):
-            v = sub.loc[sub["subset"] == f, metric]
-            mat[i, j] = float(v.iloc[0]) if not v.empty else np.nan
+    # matrix [len(funcs) x len(channels)], NaN where a function has no data
+    mat = (df.pivot_table(index="subset", columns="friendly", values=metric, aggfunc="first", observed=True)
+             .reindex(index=funcs, columns=channels)
+             .to_numpy(dtype=float))
 
     x = np.arange(len(channels))
     width = 0.22
@@ -224,49 +292,39 @@ def _bar_funcs_peer(ax, df, metric, title, ylabel):
     ax.grid(axis="y", linestyle=":", linewidth=0.6, alpha=0.6)
     ax.legend(ncol=1, frameon=True, loc="upper left", bbox_to_anchor=(0.0, 1.02))
 
-def make_plots_peer_funcs(summary: pd.DataFrame, figdir: str, dpi: int):
+def _save(fig, figdir: str, name: str, dpi: int, formats: str):
+    for fmt in formats.split(","):
+        fmt = fmt.strip()
+        fig.savefig(os.path.join(figdir, f"{name}.{fmt}"),
+                    dpi=dpi if fmt == "png" else None)
+
+def make_plots_peer_funcs(summary: pd.DataFrame, figdir: str, dpi: int, formats: str = "pdf"):
     if summary.empty:
         raise SystemExit("No docker_stats parsed for peer0. Check folder structure and CSVs.")
 
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-    })
+    apply_ieee_style()
 
     os.makedirs(figdir, exist_ok=True)
 
     # CPU%
-    fig1, ax1 = plt.subplots(figsize=figsize_ieee_single(0.80))
+    fig1, ax1 = plt.subplots(figsize=figsize_ieee_single(0.80), constrained_layout=True)
     _bar_funcs_peer(ax1, summary, "CPU_pct", "peer0 CPU usage by function/channel (avg)", "CPU (%)")
-    fig1.tight_layout()
-    fig1.savefig(os.path.join(figdir, "peer0_cpu_by_func_bw.pdf"), bbox_inches="tight")
-    fig1.savefig(os.path.join(figdir, "peer0_cpu_by_func_bw.png"), dpi=dpi, bbox_inches="tight")
+    _save(fig1, figdir, "peer0_cpu_by_func_bw", dpi, formats)
 
     # MEM%
-    fig2, ax2 = plt.subplots(figsize=figsize_ieee_single(0.80))
+    fig2, ax2 = plt.subplots(figsize=figsize_ieee_single(0.80), constrained_layout=True)
     _bar_funcs_peer(ax2, summary, "MEM_pct", "peer0 Memory usage by function/channel (avg)", "Memory (%)")
-    fig2.tight_layout()
-    fig2.savefig(os.path.join(figdir, "peer0_mem_by_func_bw.pdf"), bbox_inches="tight")
-    fig2.savefig(os.path.join(figdir, "peer0_mem_by_func_bw.png"), dpi=dpi, bbox_inches="tight")
+    _save(fig2, figdir, "peer0_mem_by_func_bw", dpi, formats)
 
     # NET delta (KB/epoch)
-    fig3, ax3 = plt.subplots(figsize=figsize_ieee_single(0.80))
+    fig3, ax3 = plt.subplots(figsize=figsize_ieee_single(0.80), constrained_layout=True)
     _bar_funcs_peer(ax3, summary, "NET_KB", "peer0 Network I/O per epoch (avg delta)", "KB / epoch")
-    fig3.tight_layout()
-    fig3.savefig(os.path.join(figdir, "peer0_net_by_func_bw.pdf"), bbox_inches="tight")
-    fig3.savefig(os.path.join(figdir, "peer0_net_by_func_bw.png"), dpi=dpi, bbox_inches="tight")
+    _save(fig3, figdir, "peer0_net_by_func_bw", dpi, formats)
 
     # BLK delta (KB/epoch)
-    fig4, ax4 = plt.subplots(figsize=figsize_ieee_single(0.80))
+    fig4, ax4 = plt.subplots(figsize=figsize_ieee_single(0.80), constrained_layout=True)
     _bar_funcs_peer(ax4, summary, "BLK_KB", "peer0 Block I/O per epoch (avg delta)", "KB / epoch")
-    fig4.tight_layout()
-    fig4.savefig(os.path.join(figdir, "peer0_blk_by_func_bw.pdf"), bbox_inches="tight")
-    fig4.savefig(os.path.join(figdir, "peer0_blk_by_func_bw.png"), dpi=dpi, bbox_inches="tight")
+    _save(fig4, figdir, "peer0_blk_by_func_bw", dpi, formats)
 
     print(f"[OK] Wrote plots to {figdir}")
 
@@ -276,13 +334,13 @@ def main():
     ap.add_argument("--root", default=".", help="folder with channel dirs (e.g., 13_64_128/)")
     ap.add_argument("--figdir", default="plots/docker_stats/figures", help="output dir for figures & summary")
     ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--formats", default="pdf", help="comma-separated list: pdf,png")
     args = ap.parse_args()
 
-    rows = []
-    for chan_name, chan_path, _logN in find_channel_dirs(args.root):
-        s = summarize_peer0_by_function(chan_name, chan_path)
-        if not s.empty:
-            rows.append(s)
+    # channels share nothing (own CSVs, own summary): parse them in parallel
+    chans = find_channel_dirs(args.root)
+    with ProcessPoolExecutor(max_workers=max(1, min(len(chans), os.cpu_count() or 1))) as ex:
+        rows = [s for s in ex.map(_summarize_worker, chans) if not s.empty]
 
     if not rows:
         raise SystemExit(f"No docker_stats.csv (peer0) found under {args.root}")
@@ -295,7 +353,7 @@ def main():
     summary.to_csv(out_csv, index=False)
     print(f"[OK] Wrote {out_csv}")
 
-    make_plots_peer_funcs(summary, args.figdir, args.dpi)
+    make_plots_peer_funcs(summary, args.figdir, args.dpi, args.formats)
 
 if __name__ == "__main__":
     main()
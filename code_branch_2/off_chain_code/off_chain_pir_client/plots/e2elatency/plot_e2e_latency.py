@@ -11,10 +11,21 @@ Plot: End-to-end single-query latency by stage; ct×pt path (IEEE grayscale).
 import argparse
 import os
 import re
+import sys
 import glob
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import apply_ieee_style
+
+try:  # optional: multi-threaded Arrow CSV parser, else pandas' C engine
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 
 # ---------- CLI ----------
 def parse_args():
@@ -22,6 +33,7 @@ def parse_args():
     p.add_argument("--data", default="data", help="input folder with CSVs")
     p.add_argument("--figdir", default="figures", help="output folder for figures and summary")
     p.add_argument("--dpi", type=int, default=300, help="PNG resolution")
+    p.add_argument("--formats", default="pdf", help="comma-separated list: pdf,png")
     return p.parse_args()
 
 # ---------- Constants ----------
@@ -30,19 +42,32 @@ STAGE_ORDER = ["keygen_ms", "enc_ms", "eval_ms", "dec_ms"]
 STAGE_NAMES = ["KeyGen", "Enc", "Eval", "Dec"]
 GRAY_COLORS = ["0.85", "0.65", "0.45", "0.25"]
 HATCH_PATTERNS = ["//", "xx", "\\\\", ".."]
+DTYPES = {"epoch": "int64", "stage": "string", "latency_ms": "float64"}
 
 # ---------- Helpers ----------
 def load_one(path):
-    df = pd.read_csv(path)
+    df = pd.read_csv(path, engine=CSV_ENGINE, dtype=DTYPES)
     if set(df.columns) != {"epoch", "stage", "latency_ms"}:
         raise ValueError(f"Unexpected columns in {path}: {df.columns.tolist()}")
-    piv = df.pivot(index="epoch", columns="stage", values="latency_ms")
-    if "eval_ms" not in piv.columns and "eval_rtt_ms" in piv.columns:
-        piv["eval_ms"] = piv["eval_rtt_ms"]
-    for s in STAGE_ORDER:
-        if s not in piv.columns:
-            piv[s] = np.nan
-    return piv[STAGE_ORDER].sort_index()
+    stages = set(df["stage"].unique())
+    if "eval_ms" not in stages and "eval_rtt_ms" in stages:
+        df["stage"] = df["stage"].replace("eval_rtt_ms", "eval_ms")
+    return df
+
+def summarize(frames):
+    """Per-(logN, record_s) stage mean/std over epochs, in one groupby."""
+    big = pd.concat(frames, ignore_index=True)
+    keys = ["logN", "record_s"]
+    stats = (big.groupby(keys + ["stage"])["latency_ms"]
+                .agg(["mean", "std"])
+                .unstack("stage"))
+    means = stats["mean"].reindex(columns=STAGE_ORDER)
+    stds = stats["std"].reindex(columns=STAGE_ORDER)
+    out = pd.concat([means.add_prefix("mean_"), stds.add_prefix("std_")], axis=1)
+    out["total_mean_ms"] = means.sum(axis=1)  # NaN stages count as 0
+    out["total_std_ms"] = np.sqrt((stds ** 2).sum(axis=1))
+    out["epochs"] = big.groupby(keys)["epoch"].nunique()
+    return out.reset_index()
 
 def ieee_figsize_single_column(aspect=0.7):
     w = 3.5
@@ -57,67 +82,45 @@ def main():
     if not csv_paths:
         raise SystemExit(f"No CSVs found in {args.data}")
 
-    series_list, summary_rows = [], []
-
+    frames = []
     for pth in csv_paths:
         m = FNAME_RE.search(os.path.basename(pth))
         if not m:
             continue
         logN, record_s = int(m.group(1)), int(m.group(2))
-        piv = load_one(pth)
-        means, stds = piv.mean(skipna=True), piv.std(ddof=1, skipna=True)
-        total_mean = float(np.nansum([means.get(s, np.nan) for s in STAGE_ORDER]))
-        total_std = float(np.sqrt(np.nansum([stds.get(s, 0.0)**2 for s in STAGE_ORDER])))
-
-        series_list.append({
-            "logN": logN, "record_s": record_s,
-            "means": means, "stds": stds,
-            "total_mean": total_mean, "total_std": total_std
-        })
-        summary_rows.append({
-            "logN": logN, "record_s": record_s,
-            **{f"mean_{k}": means.get(k, np.nan) for k in STAGE_ORDER},
-            **{f"std_{k}": stds.get(k, np.nan) for k in STAGE_ORDER},
-            "total_mean_ms": total_mean, "total_std_ms": total_std,
-            "epochs": piv.shape[0],
-        })
-
-    series_list.sort(key=lambda d: d["logN"])
-    summary_df = pd.DataFrame(summary_rows).sort_values(["logN", "record_s"])
+        frames.append(load_one(pth).assign(logN=logN, record_s=record_s))
+    if not frames:
+        raise SystemExit(f"No e2elatency_<logN>_<record_s>.csv files in {args.data}")
+
+    summary_df = summarize(frames)  # sorted by (logN, record_s)
     summary_csv = os.path.join(args.figdir, "e2e_latency_summary.csv")
     summary_df.to_csv(summary_csv, index=False)
 
         # ---------- Plot ----------
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-    })
-
-    fig, ax = plt.subplots(figsize=ieee_figsize_single_column())
-
-    x = np.arange(len(series_list))
+    apply_ieee_style()
+
+    fig, ax = plt.subplots(figsize=ieee_figsize_single_column(), constrained_layout=True)
+
+    x = np.arange(len(summary_df))
     width = 0.58
-    bottoms = np.zeros_like(x, dtype=float)
 
-    for i, (stage_key, stage_disp) in enumerate(zip(STAGE_ORDER, STAGE_NAMES)):
-        vals = np.array([d["means"].get(stage_key, np.nan) for d in series_list], dtype=float)
+    # rows = ring configs, cols = stages; missing stages stack as 0
+    M = np.nan_to_num(summary_df[[f"mean_{s}" for s in STAGE_ORDER]].to_numpy(dtype=float), nan=0.0)
+    tops = np.cumsum(M, axis=1)
+    bottoms = np.hstack([np.zeros((len(x), 1)), tops[:, :-1]])
+
+    for i, stage_disp in enumerate(STAGE_NAMES):
         ax.bar(
-            x, np.nan_to_num(vals, nan=0.0),
-            width, bottom=bottoms,
+            x, M[:, i],
+            width, bottom=bottoms[:, i],
             label=stage_disp,
             color=GRAY_COLORS[i],
             hatch=HATCH_PATTERNS[i],
             edgecolor="black", linewidth=0.5
         )
-        bottoms += np.nan_to_num(vals, nan=0.0)
 
     # X-axis as ring sizes
-    xtick_labels = [f"$2^{{{d['logN']}}}$" for d in series_list]
+    xtick_labels = [f"$2^{{{logN}}}$" for logN in summary_df["logN"]]
     ax.set_xticks(x)
     ax.set_xticklabels(xtick_labels)
     ax.set_xlabel("Ring size $N$")
@@ -129,23 +132,20 @@ def main():
     ax.set_ylim(0, 200)
 
     # Annotate total means
-    for xi, d in zip(x, series_list):
-        total = d["total_mean"]
+    for xi, total in zip(x, summary_df["total_mean_ms"]):
         if not np.isnan(total):
-            ax.text(xi, bottoms[xi] + 2, f"{total:.1f}",
+            ax.text(xi, tops[xi, -1] + 2, f"{total:.1f}",
                     ha="center", va="bottom", fontsize=7)
 
     ax.legend(frameon=True, ncol=2, loc="upper left", bbox_to_anchor=(0.0, 1.03))
-    fig.tight_layout()
-
 
-    pdf_path = os.path.join(args.figdir, "e2e_latency_stacked.pdf")
-    png_path = os.path.join(args.figdir, "e2e_latency_stacked.png")
-    fig.savefig(pdf_path, bbox_inches="tight")
-    fig.savefig(png_path, dpi=args.dpi, bbox_inches="tight")
 
-    print(f"[OK] Wrote {pdf_path}")
-    print(f"[OK] Wrote {png_path}")
+    for fmt in args.formats.split(","):
+        fmt = fmt.strip()
+        out = os.path.join(args.figdir, f"e2e_latency_stacked.{fmt}")
+        # the title is wider than the 3.5" column; tight bbox keeps it uncropped
+        fig.savefig(out, dpi=args.dpi if fmt == "png" else None, bbox_inches="tight")
+        print(f"[OK] Wrote {out}")
     print(f"[OK] Wrote {summary_csv}")
 
 if __name__ == "__main__":
@@ -21,14 +21,26 @@ Example usage:
 """
 
 import os
+import sys
 import argparse
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
-from matplotlib.offsetbox import AnchoredText
-
-def load_image(path):
+from PIL import Image
+import pil_plate
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import pyplot, apply_ieee_style
+
+def load_image(path, size_px=None):
+    """
+    Read an image as an array; with size_px=(w, h), shrink it (never enlarge)
+    to the pixels its panel will occupy in the output.
+    """
+    from matplotlib.image import pil_to_array
     try:
-        return mpimg.imread(path)
+        img = Image.open(path)
+        if size_px:
+            w, h = min(img.width, size_px[0]), min(img.height, size_px[1])
+            if (w, h) != img.size:
+                img = img.resize((w, h), Image.BOX)
+        return pil_to_array(img)
     except Exception as e:
         raise SystemExit(f"Failed to read image: {path}\n{e}")
 
@@ -49,25 +61,13 @@ def main():
     ap.add_argument("--label-size", type=int, default=14, help="panel label font size")
     ap.add_argument("--label-offset", type=float, default=0.015, help="offset from top-left")
     ap.add_argument("--dpi", type=int, default=300, help="output DPI")
+    ap.add_argument("--fast", action="store_true", help="PNG panels only: paste with Pillow instead of rendering through matplotlib")
     args = ap.parse_args()
 
     n = len(args.images)
     if n != 6:
         raise SystemExit(f"Expected 6 images for a 2x3 grid, got {n}.")
 
-    # Set style
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-    })
-
-    fig = plt.figure(figsize=(args.width_in, args.height_in), constrained_layout=False)
-
     pad = args.pad
     grid_w = 1.0 - 2 * pad
     grid_h = 1.0 - 2 * pad
@@ -77,21 +77,43 @@ def main():
     if cell_w <= 0 or cell_h <= 0:
         raise SystemExit("Negative cell size. Adjust wspace/hspace/pad or grid size.")
 
-    for idx, img_path in enumerate(args.images):
+    boxes = []
+    for idx in range(n):
         r = idx // args.cols
         c = idx % args.cols
         top_row_y = pad + (args.rows - 1 - r) * (cell_h + args.hspace)
         left_x = pad + c * (cell_w + args.wspace)
+        boxes.append([left_x, top_row_y, cell_w, cell_h])
+    labels = [letter(i) for i in range(len(args.images))]
+
+    if args.fast:
+        if pil_plate.all_png(args.images):
+            pil_plate.compose(args.images, boxes, labels, args.out, args.width_in, args.height_in, args.dpi,
+                              args.label_size, args.label_offset)
+            print(f"[OK] Composite 6-panel figure written to {args.out}")
+            return
+        print("[WARN] --fast needs PNG panels only; rendering with matplotlib")
+
+    plt = pyplot()
+    from matplotlib.offsetbox import AnchoredText
+
+    # Set style
+    apply_ieee_style()
+
+    fig = plt.figure(figsize=(args.width_in, args.height_in), constrained_layout=False)
+
+    # on-page pixel size of one panel at the output DPI
+    size_px = (max(1, int(cell_w * args.width_in * args.dpi)), max(1, int(cell_h * args.height_in * args.dpi)))
 
-        ax = fig.add_axes([left_x, top_row_y, cell_w, cell_h])
+    for idx, (img_path, box) in enumerate(zip(args.images, boxes)):
+        ax = fig.add_axes(box)
         ax.axis("off")
-        img = load_image(img_path)
+        img = load_image(img_path, size_px)
         ax.imshow(img)
         ax.set_aspect('auto')
 
         # Panel label A–F
-        label = letter(idx)
-        at = AnchoredText(label, prop=dict(size=args.label_size, weight='bold'),
+        at = AnchoredText(labels[idx], prop=dict(size=args.label_size, weight='bold'),
                           frameon=False, loc='upper left',
                           bbox_to_anchor=(0, 1), bbox_transform=ax.transAxes,
                           borderpad=0.0, pad=0.0)
@@ -14,13 +14,26 @@ Example:
 """
 
 import os
+import sys
 import argparse
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
-
-def load_image(path):
+from PIL import Image
+import pil_plate
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import pyplot, apply_ieee_style
+
+def load_image(path, size_px=None):
+    """
+    Read an image as an array; with size_px=(w, h), shrink it (never enlarge)
+    to the pixels its panel will occupy in the output.
+    """
+    from matplotlib.image import pil_to_array
     try:
-        return mpimg.imread(path)
+        img = Image.open(path)
+        if size_px:
+            w, h = min(img.width, size_px[0]), min(img.height, size_px[1])
+            if (w, h) != img.size:
+                img = img.resize((w, h), Image.BOX)
+        return pil_to_array(img)
     except Exception as e:
         raise SystemExit(f"Failed to read image: {path}\n{e}")
 
@@ -39,24 +52,13 @@ def main():
     ap.add_argument("--label-size", type=int, default=12, help="panel label font size")
     ap.add_argument("--label-offset", type=float, default=0.015, help="label inset from top-left (axes fraction)")
     ap.add_argument("--dpi", type=int, default=300, help="render DPI for output PDF")
+    ap.add_argument("--fast", action="store_true", help="PNG panels only: paste with Pillow instead of rendering through matplotlib")
     args = ap.parse_args()
 
     if len(args.images) != 3:
         raise SystemExit(f"Expected exactly 3 images for a 1x3 grid, got {len(args.images)}.")
 
-    # Pub-friendly defaults
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-    })
-
     cols, rows = 1, 3
-    fig = plt.figure(figsize=(args.width_in, args.height_in), constrained_layout=False)
 
     # Normalized layout math
     pad = args.pad
@@ -67,23 +69,45 @@ def main():
     if cell_w <= 0 or cell_h <= 0:
         raise SystemExit("Negative cell size. Adjust hspace/pad/height.")
 
-    for idx, img_path in enumerate(args.images):
+    boxes = []
+    for idx in range(rows):
         r = idx  # row index 0..2
         c = 0
         # Top-left origin (row 0 at top)
         top_row_y = pad + (rows - 1 - r) * (cell_h + args.hspace)
         left_x = pad + c * (cell_w + args.wspace)
+        boxes.append([left_x, top_row_y, cell_w, cell_h])
+    labels = [letter(i) for i in range(len(args.images))]
+
+    if args.fast:
+        if pil_plate.all_png(args.images):
+            pil_plate.compose(args.images, boxes, labels, args.out, args.width_in, args.height_in, args.dpi,
+                              args.label_size, args.label_offset)
+            print(f"[OK] Wrote {args.out}")
+            return
+        print("[WARN] --fast needs PNG panels only; rendering with matplotlib")
+
+    plt = pyplot()
+
+    # Pub-friendly defaults
+    apply_ieee_style()
+
+    fig = plt.figure(figsize=(args.width_in, args.height_in), constrained_layout=False)
+
+    # on-page pixel size of one panel at the output DPI
+    size_px = (max(1, int(cell_w * args.width_in * args.dpi)), max(1, int(cell_h * args.height_in * args.dpi)))
 
-        ax = fig.add_axes([left_x, top_row_y, cell_w, cell_h])
+    for idx, (img_path, box) in enumerate(zip(args.images, boxes)):
+        ax = fig.add_axes(box)
         ax.axis("off")
 
-        img = load_image(img_path)
+        img = load_image(img_path, size_px)
         ax.imshow(img)
         ax.set_aspect('auto')
 
         # Panel label A/B/C — safer than AnchoredText poking internals
         ax.text(args.label_offset, 1 - args.label_offset,
-                letter(idx),
+                labels[idx],
                 transform=ax.transAxes,
                 fontsize=args.label_size,
                 fontweight='bold',
@@ -19,16 +19,28 @@ Examples:
 """
 
 import os
+import sys
 import argparse
 import math
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
-from matplotlib.offsetbox import AnchoredText
-
-def load_image(path):
-    # mpimg can read PNGs reliably; for PDFs, matplotlib may rasterize via backend if available
+from PIL import Image
+import pil_plate
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import pyplot, apply_ieee_style
+
+def load_image(path, size_px=None):
+    """
+    Read an image as an array; with size_px=(w, h), shrink it (never enlarge)
+    to the pixels its panel will occupy in the output.
+    """
+    # Pillow reads PNG/JPEG; PDF panels have to be exported as PNG first
+    from matplotlib.image import pil_to_array
     try:
-        return mpimg.imread(path)
+        img = Image.open(path)
+        if size_px:
+            w, h = min(img.width, size_px[0]), min(img.height, size_px[1])
+            if (w, h) != img.size:
+                img = img.resize((w, h), Image.BOX)
+        return pil_to_array(img)
     except Exception as e:
         raise SystemExit(f"Failed to read image: {path}\n{e}")
 
@@ -49,6 +61,7 @@ def main():
     ap.add_argument("--label-size", type=int, default=12, help="panel label font size")
     ap.add_argument("--label-offset", type=float, default=0.015, help="panel label offset from top-left (axes fraction)")
     ap.add_argument("--dpi", type=int, default=300, help="render DPI for the output PDF")
+    ap.add_argument("--fast", action="store_true", help="PNG panels only: paste with Pillow instead of rendering through matplotlib")
     args = ap.parse_args()
 
     n = len(args.images)
@@ -57,19 +70,7 @@ def main():
     if args.cols * args.rows < n:
         raise SystemExit(f"Grid {args.rows}x{args.cols} cannot fit {n} images. Increase rows/cols.")
 
-    # Matplotlib styling for publication
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-    })
-
     fig_w, fig_h = args.width_in, args.height_in
-    fig = plt.figure(figsize=(fig_w, fig_h), constrained_layout=False)
 
     # Compute normalized panel size
     pad = args.pad
@@ -80,26 +81,49 @@ def main():
     if cell_w <= 0 or cell_h <= 0:
         raise SystemExit("Negative cell size. Reduce wspace/hspace/pad or cols/rows.")
 
-    # Place each image
-    for idx, img_path in enumerate(args.images):
+    # Panel slots [left, bottom, w, h]; top-left origin for row index (row 0 = top)
+    boxes = []
+    for idx in range(n):
         r = idx // args.cols
         c = idx % args.cols
-        # Top-left origin for row index (row 0 = top)
         top_row_y = pad + (args.rows - 1 - r) * (cell_h + args.hspace)
         left_x = pad + c * (cell_w + args.wspace)
+        boxes.append([left_x, top_row_y, cell_w, cell_h])
+    labels = [letter(i) for i in range(len(args.images))]
+
+    if args.fast:
+        if pil_plate.all_png(args.images):
+            pil_plate.compose(args.images, boxes, labels, args.out, fig_w, fig_h, args.dpi,
+                              args.label_size, args.label_offset)
+            print(f"[OK] Wrote {args.out}")
+            return
+        print("[WARN] --fast needs PNG panels only; rendering with matplotlib")
+
+    # matplotlib is only needed from here on
+    plt = pyplot()
+    from matplotlib.offsetbox import AnchoredText
 
+    # Matplotlib styling for publication
+    apply_ieee_style()
+
+    fig = plt.figure(figsize=(fig_w, fig_h), constrained_layout=False)
+
+    # on-page pixel size of one panel at the output DPI
+    size_px = (max(1, int(cell_w * fig_w * args.dpi)), max(1, int(cell_h * fig_h * args.dpi)))
+
+    # Place each image
+    for idx, (img_path, box) in enumerate(zip(args.images, boxes)):
         # Add axes for this slot
-        ax = fig.add_axes([left_x, top_row_y, cell_w, cell_h])
+        ax = fig.add_axes(box)
         ax.axis("off")
 
         # Read and draw the image (fill, keeping aspect)
-        img = load_image(img_path)
+        img = load_image(img_path, size_px)
         ax.imshow(img)
         ax.set_aspect('auto')
 
         # Panel label (A, B, C, ...)
-        label = letter(idx)
-        at = AnchoredText(label, prop=dict(size=args.label_size, weight='bold'),
+        at = AnchoredText(labels[idx], prop=dict(size=args.label_size, weight='bold'),
                           frameon=False, loc='upper left',
                           bbox_to_anchor=(0, 1), bbox_transform=ax.transAxes,
                           borderpad=0.0, pad=0.0)
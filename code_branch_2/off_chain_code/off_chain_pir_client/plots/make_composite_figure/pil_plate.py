@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Pillow-only plate writer behind the composite scripts' --fast flag.
+
+Uses the same normalized layout as the matplotlib path (panel boxes in
+figure fractions, stretched to fill, bold label at the top-left), but the
+PNG panels are pasted straight into one RGB canvas: no Figure/Axes and no
+trip through the renderer. Output is raster (PNG, or a PDF wrapping it).
+"""
+
+import os
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+def all_png(paths):
+    return all(p.lower().endswith(".png") for p in paths)
+
+def label_font(size_pt, dpi):
+    # same bold sans-serif the matplotlib path would pick, if available
+    px = max(1, round(size_pt * dpi / 72))
+    try:
+        from matplotlib import font_manager
+        path = font_manager.findfont(font_manager.FontProperties(family="sans-serif", weight="bold"))
+        return ImageFont.truetype(path, px)
+    except Exception:
+        return ImageFont.load_default(px)
+
+def compose(images, boxes, labels, out, width_in, height_in, dpi,
+            label_size, label_offset, pad_inches=0.1):
+    """
+    Paste images into a width_in x height_in canvas at dpi and save to out.
+    boxes are [left, bottom, width, height] figure fractions (add_axes order).
+    """
+    W, H = round(width_in * dpi), round(height_in * dpi)
+    canvas = Image.new("RGB", (W, H), "white")
+    draw = ImageDraw.Draw(canvas)
+    font = label_font(label_size, dpi)
+
+    for path, (left, bottom, w, h), label in zip(images, boxes, labels):
+        x0, y0 = round(left * W), round((1 - bottom - h) * H)  # top-left origin
+        cw, ch = max(1, round(w * W)), max(1, round(h * H))
+        try:
+            panel = Image.open(path).convert("RGBA")
+        except Exception as e:
+            raise SystemExit(f"Failed to read image: {path}\n{e}")
+        shrink = panel.width >= cw and panel.height >= ch
+        panel = panel.resize((cw, ch), Image.BOX if shrink else Image.BICUBIC)
+        canvas.paste(panel, (x0, y0), panel)
+        draw.text((x0 + label_offset * cw, y0 + label_offset * ch), label,
+                  fill="black", font=font, anchor="la")
+
+    # crop to the drawn content plus a margin, like bbox_inches="tight"
+    bbox = ImageOps.invert(canvas.convert("L")).getbbox()
+    if bbox:
+        p = round(pad_inches * dpi)
+        canvas = canvas.crop((max(0, bbox[0] - p), max(0, bbox[1] - p),
+                              min(W, bbox[2] + p), min(H, bbox[3] + p)))
+
+    out_dir = os.path.dirname(out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    if out.lower().endswith(".pdf"):
+        canvas.save(out, "PDF", resolution=dpi)
+    else:
+        canvas.save(out, dpi=(dpi, dpi))
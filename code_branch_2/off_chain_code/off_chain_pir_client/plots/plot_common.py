@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Helpers shared by the plot scripts in the subfolders: the IEEE rcParams,
+a lazy pyplot import, hatched bar series and output stamps. Each script puts
+this folder on sys.path before importing it, so they all still run as
+standalone scripts (and via ../report.py).
+"""
+
+import os
+import hashlib
+import functools
+import numpy as np
+
+IEEE_STYLE = {
+    "font.family": "sans-serif",
+    "font.size": 8,
+    "axes.labelsize": 8,
+    "axes.titlesize": 9,
+    "xtick.labelsize": 7,
+    "ytick.labelsize": 7,
+    "legend.fontsize": 7,
+}
+
+def pyplot():
+    """
+    matplotlib.pyplot on the Agg backend. Scripts call this where they first
+    draw, so --help, argument/input errors and --no-plot runs never pay for
+    the matplotlib start-up.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+@functools.cache
+def apply_ieee_style():
+    # rcParams are process-global; set them once
+    pyplot().style.use(IEEE_STYLE)
+
+def hatched_bars(ax, x, heights, width, bottom=0.0, label=None, **style):
+    """
+    Like ax.bar, but the whole series is one PolyCollection, so the backend
+    strokes its hatch once instead of once per bar. NaN bars are skipped.
+    Returns a Patch with the same style, for use as a legend handle.
+    """
+    from matplotlib.collections import PolyCollection
+    from matplotlib.patches import Patch
+    x, h, b = np.broadcast_arrays(np.asarray(x, float), np.asarray(heights, float), bottom)
+    ok = ~(np.isnan(h) | np.isnan(b))
+    xl, xr, y0, y1 = x[ok] - width/2, x[ok] + width/2, b[ok], b[ok] + h[ok]
+    # (n_bars, 4 corners, xy), built column-wise with no per-bar Rectangle
+    verts = np.stack([np.column_stack(c) for c in ((xl, y0), (xr, y0), (xr, y1), (xl, y1))], axis=1)
+    pc = PolyCollection(verts, **style)
+    pc.sticky_edges.y.append(0)  # as ax.bar: no margin below the baseline
+    ax.add_collection(pc)
+    return Patch(label=label, **style)
+
+def source_digest(script, args, inputs=()):
+    """
+    blake2b over everything an output depends on: the calling script and
+    this module, the parsed options (except --force), and the path, size
+    and mtime of every input file.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for src in (script, __file__):
+        with open(src, "rb") as f:
+            h.update(f.read())
+    h.update(repr(sorted((k, v) for k, v in vars(args).items() if k != "force")).encode())
+    for p in sorted(inputs):
+        st = os.stat(p)
+        h.update(f"{p}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+def outputs_current(stamp, digest, outputs):
+    """True if all outputs exist and the sidecar stamp matches the digest."""
+    if not all(os.path.exists(o) for o in outputs):
+        return False
+    try:
+        with open(stamp) as f:
+            return f.read().strip() == digest
+    except FileNotFoundError:
+        return False
+
+def write_stamp(stamp, digest):
+    with open(stamp, "w") as f:
+        f.write(digest)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Multi-page PDF report of the bar-chart figures (one figure per page).
+- Pages : artifacts sizes, chaincode timings, block vs world-state,
+          block breakdown, world-state breakdown
+- Output: ./plots/figures/report.pdf
+
+All pages go through one PdfPages stream in one process, so the Agg
+backend is set up once and fonts are embedded once for the document.
+The per-figure scripts keep their own entrypoints; this only calls
+their make_figure().
+"""
+
+import os
+import argparse
+import importlib.util
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(relpath):
+    # the scripts live in per-figure folders without __init__.py
+    name = os.path.splitext(os.path.basename(relpath))[0]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, relpath))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--artifacts-data", default="plots/artifacts_size/data", help="artifacts_<logN>_<record_s>.csv folder")
+    ap.add_argument("--unit", choices=["bytes","KB","MB"], default="KB", help="unit for the artifacts page")
+    ap.add_argument("--timings-root", default=".", help="folder containing channel folders (e.g. 13_64_128/)")
+    ap.add_argument("--ylim_block", type=float, default=None, help="Y-axis top limit for the block breakdown (KB)")
+    ap.add_argument("--ylim_ws", type=float, default=None, help="Y-axis top limit for the world-state breakdown (KB)")
+    ap.add_argument("--out", default="plots/figures/report.pdf", help="output PDF path")
+    args = ap.parse_args()
+
+    arts = load_script("artifacts_size/plot_artifacts_size.py")
+    timings = load_script("chaincode_timings/plot_chaincode_timings.py")
+    bvw = load_script("block_vs_worldstate/plot_block_worldstate.py")
+    stacked = load_script("block_vs_worldstate/plot_block_ws_stacked.py")
+
+    pages = [
+        lambda: arts.make_figure(argparse.Namespace(data=args.artifacts_data, unit=args.unit)),
+        lambda: timings.make_figure(argparse.Namespace(root=args.timings_root)),
+        lambda: bvw.make_figure(args),
+        lambda: stacked.make_figure(args, "block"),
+        lambda: stacked.make_figure(args, "ws"),
+    ]
+
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with PdfPages(args.out) as pp:
+        for make in pages:
+            fig = make()
+            pp.savefig(fig, bbox_inches="tight")  # uncropped titles, as in the single files
+            plt.close(fig)
+    print(f"[OK] Wrote {args.out} ({len(pages)} pages)")
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,17 @@
 Utilization stacked bars (IEEE, grayscale)
 
 Reads : ./data/scaling_util.csv  (columns: logN,target_record_s,actual_record_s,n,N,utilization)
-Writes: ./figures/scaling_util_utilization_stacked.pdf / .png
+Writes: ./figures/scaling_util_utilization_stacked.pdf (.png with --formats pdf,png)
 Bar per ring size (2^13, 2^14, 2^15) stacked: [utilized, unused].
 """
 
 import os
+import sys
 import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import pyplot, apply_ieee_style, hatched_bars
 
 def ieee_figsize_single_column(aspect=0.70):
     w = 3.5  # inches
@@ -24,6 +26,7 @@ def main():
     p.add_argument("--indir", default="data", help="input folder")
     p.add_argument("--outdir", default="figures", help="output folder")
     p.add_argument("--png_dpi", type=int, default=300)
+    p.add_argument("--formats", default="pdf", help="comma-separated list: pdf,png")
     p.add_argument("--aggregate", choices=["mean","median"], default="mean",
                    help="aggregation across record_s per logN")
     args = p.parse_args()
@@ -35,30 +38,31 @@ def main():
     if not os.path.exists(csv_path):
         raise SystemExit(f"missing input: {csv_path}")
 
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, usecols=["logN", "utilization"],
+                     dtype={"logN": "int16", "utilization": "float32"})
 
-    # Aggregate utilization per ring size
-    agg = df.groupby("logN")["utilization"]
+    # Aggregate utilization per ring size; bin k is ring 2^(13+k), NaNs skipped
+    rings = [13,14,15]
+    idx = df["logN"].to_numpy(dtype=np.intp) - rings[0]
+    util = df["utilization"].to_numpy(dtype=np.float64)  # stored float32, summed in float64
+    keep = (idx >= 0) & (idx < len(rings)) & ~np.isnan(util)
+    idx, util = idx[keep], util[keep]
     if args.aggregate == "mean":
-        by_ring = agg.mean()
+        sums = np.bincount(idx, weights=util, minlength=len(rings))
+        counts = np.bincount(idx, minlength=len(rings))
+        with np.errstate(invalid="ignore"):
+            utilized = sums / counts  # 0/0 -> NaN for a ring with no rows
     else:
-        by_ring = agg.median()
+        utilized = np.array([np.median(util[idx == k]) if (idx == k).any() else np.nan
+                             for k in range(len(rings))])
 
     # Prepare bar data
-    rings = [13,14,15]
-    utilized = np.array([by_ring.get(r, np.nan) for r in rings], dtype=float)
     unused   = 1.0 - utilized
 
+    plt = pyplot()
+
     # Style (IEEE grayscale)
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-    })
+    apply_ieee_style()
 
     fig, ax = plt.subplots(figsize=ieee_figsize_single_column(aspect=0.75))
 
@@ -68,10 +72,12 @@ def main():
     # Colors (gray shades), hatches for clarity if printed
     col_util = "0.30"
     col_free = "0.75"
-    bars1 = ax.bar(x, utilized, width, color=col_util, edgecolor="black", linewidth=0.6,
-                   label="Utilized", hatch="")
-    bars2 = ax.bar(x, unused, width, bottom=utilized, color=col_free, edgecolor="black",
-                   linewidth=0.6, label="Unused", hatch="//")
+    handles = [
+        hatched_bars(ax, x, utilized, width, label="Utilized", facecolor=col_util,
+                     edgecolor="black", linewidth=0.6, hatch=""),
+        hatched_bars(ax, x, unused, width, bottom=utilized, label="Unused", facecolor=col_free,
+                     edgecolor="black", linewidth=0.6, hatch="//"),
+    ]
 
     # X labels as ring size
     xticklabels = [r"$2^{%d}$" % L for L in rings]
@@ -83,25 +89,23 @@ def main():
 
     ax.set_ylim(0.0, 1.05)
     ax.grid(axis="y", linestyle=":", linewidth=0.6, alpha=0.6)
-    ax.legend(frameon=True, loc="upper right", ncol=1)
+    ax.legend(handles=handles, frameon=True, loc="upper right", ncol=1)
 
-    # Annotate percentages on each segment
-    for xi, u in enumerate(utilized):
-        if np.isnan(u):
-            continue
-        # utilized label
+    # Annotate percentages on each segment; the unused label only where it fits
+    has_util = ~np.isnan(utilized)
+    has_free = has_util & (unused > 0.03)
+    for xi, u in zip(x[has_util], utilized[has_util]):
         ax.text(xi, u/2, f"{100*u:.1f}%", ha="center", va="center", color="white", fontsize=7)
-        # unused label
-        rem = 1.0 - u
-        if rem > 0.03:
-            ax.text(xi, u + rem/2, f"{100*rem:.1f}%", ha="center", va="center", color="black", fontsize=7)
+    for xi, u, rem in zip(x[has_free], utilized[has_free], unused[has_free]):
+        ax.text(xi, u + rem/2, f"{100*rem:.1f}%", ha="center", va="center", color="black", fontsize=7)
 
     fig.tight_layout()
-    pdf_path = os.path.join(args.outdir, "scaling_util_utilization_stacked.pdf")
-    png_path = os.path.join(args.outdir, "scaling_util_utilization_stacked.png")
-    fig.savefig(pdf_path, bbox_inches="tight")
-    fig.savefig(png_path, dpi=args.png_dpi, bbox_inches="tight")
-    print(f"[OK] wrote {pdf_path}\n[OK] wrote {png_path}")
+    for fmt in args.formats.split(","):
+        fmt = fmt.strip()
+        out = os.path.join(args.outdir, f"scaling_util_utilization_stacked.{fmt}")
+        fig.savefig(out, dpi=args.png_dpi if fmt == "png" else None, bbox_inches="tight")
+        print(f"[OK] wrote {out}")
+    plt.close(fig)
 
 if __name__ == "__main__":
     main()
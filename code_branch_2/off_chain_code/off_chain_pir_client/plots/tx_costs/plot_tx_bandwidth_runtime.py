@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, argparse
+import os, sys, argparse
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # plots/, for plot_common
+from plot_common import pyplot, apply_ieee_style, hatched_bars
 
 GRAY = ["0.25", "0.55", "0.75"]
 HATCH = ["", "//", "xx"]
@@ -16,103 +17,115 @@ LABELS = {
     "15_128_256": "rich",
 }
 
+# only these columns are used; friendly is optional in the NET CSV
+NET_DTYPES = {"channel": "string", "friendly": "string", "CONTAINER": "string",
+              "subset": "string", "NET_KB": "float64"}
+
 def figsize_ieee_double(aspect=0.35):
     w = 7.2  # IEEE double-column width in inches
     return (w, w * aspect)
 
+def friendly_labels(channel: pd.Series) -> pd.Series:
+    """LABELS[channel], else the channel itself; looked up once per distinct channel."""
+    codes, uniques = pd.factorize(channel)
+    names = np.array([LABELS.get(u, u) for u in uniques] + [pd.NA], dtype=object)
+    return pd.Series(names[codes], index=channel.index, dtype="string")  # code -1 -> NA
+
 def load_net(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
-    df = df.copy()
+    df = pd.read_csv(csv_path, usecols=lambda c: c in NET_DTYPES, dtype=NET_DTYPES)
     df["friendly"] = df.get("friendly", pd.Series(dtype=str))
     if "friendly" not in df.columns or df["friendly"].isna().all():
-        df["friendly"] = df["channel"].map(LABELS).fillna(df["channel"])
-    df = df[(df["CONTAINER"].str.contains("peer", case=False, na=False)) &
-            (df["subset"].str.lower() == "pirquery")]
-    out = df[["channel", "friendly", "NET_KB"]].groupby(["channel", "friendly"], as_index=False).mean()
-    return out
+        df["friendly"] = friendly_labels(df["channel"])
+    # plain substring / equality on string dtype; no regex, no object round-trip
+    is_peer = df["CONTAINER"].str.contains("peer", case=False, na=False, regex=False)
+    is_pir = df["subset"].str.lower().eq("pirquery").fillna(False)
+    df = df.loc[is_peer & is_pir]
+    # group on category codes; observed=True skips absent channel/friendly pairs
+    keys = df[["channel", "friendly"]].astype("category")
+    out = (df["NET_KB"].groupby([keys["channel"], keys["friendly"]], observed=True).mean()
+                       .reset_index())
+    return out.astype({"channel": "string", "friendly": "string"})
 
 def load_time(csv_path: str) -> pd.DataFrame:
-    df = pd.read_csv(csv_path)
+    # one pass over the file, parsing only channel and the PIRQuery column
+    df = pd.read_csv(csv_path, usecols=lambda c: c == "channel" or c.strip().lower() == "pirquery",
+                     dtype={"channel": "string"})
     if "channel" not in df.columns:
         raise SystemExit(f"timings CSV missing 'channel': {csv_path}")
-    cols = {c: c.strip() for c in df.columns}
-    df.rename(columns=cols, inplace=True)
-    pir_col = None
-    for c in df.columns:
-        if c.strip().lower() == "pirquery":
-            pir_col = c
-            break
+    pir_col = next((c for c in df.columns if c != "channel"), None)
     if pir_col is None:
         raise SystemExit("timings CSV must contain a 'PIRQuery' column (ms).")
-    df["friendly"] = df["channel"].map(LABELS).fillna(df["channel"])
+    df[pir_col] = df[pir_col].astype("float64")
+    df["friendly"] = friendly_labels(df["channel"])
     return df[["channel", "friendly", pir_col]].rename(columns={pir_col: "PIR_ms"})
 
 def compute_projection(net_df: pd.DataFrame, time_df: pd.DataFrame) -> pd.DataFrame:
-    m = pd.merge(net_df, time_df, on=["channel", "friendly"], how="inner")
+    # both frames are keyed by channel; join on the index instead of a column merge
+    keys = ["channel", "friendly"]
+    m = net_df.set_index(keys).join(time_df.set_index(keys), how="inner").reset_index()
     # Convert KB → MB (decimal)
-    m["MB_per_tx"] = m["NET_KB"] / 1000.0
-    # PIR ms → minutes per tx
-    m["min_per_tx"] = (m["PIR_ms"] / 1000.0) / 60.0
-
-    rows = []
-    for _, row in m.iterrows():
-        for count in COUNTS:
-            rows.append({
-                "channel": row["channel"],
-                "friendly": row["friendly"],
-                "tx_count": count,
-                "bandwidth_MB": row["MB_per_tx"] * count,
-                "runtime_min": row["min_per_tx"] * count,
-                "MB_per_tx": row["MB_per_tx"],
-                "ms_per_tx": row["PIR_ms"],
-            })
-    return pd.DataFrame(rows)
-
-def plot_plate(df_proj: pd.DataFrame, figdir: str, dpi: int):
-    plt.rcParams.update({
-        "font.family": "sans-serif",
-        "font.size": 8,
-        "axes.labelsize": 8,
-        "axes.titlesize": 9,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
+    mb_per_tx = m["NET_KB"].to_numpy(dtype=float) / 1000.0
+    # PIR ms → minutes per tx; second step in place, same rounding as /1000/60
+    min_per_tx = m["PIR_ms"].to_numpy(dtype=float) / 1000.0
+    min_per_tx /= 60.0
+
+    # one row per (channel, tx_count), channel-major; totals are outer products
+    C = np.asarray(COUNTS)
+    k = len(C)
+    return pd.DataFrame({
+        "channel": np.repeat(m["channel"].to_numpy(), k),
+        "friendly": np.repeat(m["friendly"].to_numpy(), k),
+        "tx_count": np.tile(C, len(m)),
+        "bandwidth_MB": np.outer(mb_per_tx, C).ravel(),
+        "runtime_min": np.outer(min_per_tx, C).ravel(),
+        "MB_per_tx": np.repeat(mb_per_tx, k),
+        "ms_per_tx": np.repeat(m["PIR_ms"].to_numpy(), k),
     })
+
+def plot_plate(df_proj: pd.DataFrame, figdir: str, dpi: int, formats: str = "pdf"):
+    plt = pyplot()
+    apply_ieee_style()
     os.makedirs(figdir, exist_ok=True)
 
+    if df_proj.empty:
+        # e.g. no peer PIRQuery rows in --netcsv: say so instead of drawing empty axes
+        print("[WARN] no channel is in both input CSVs; writing a 'no data' plate")
+        fig = plt.figure(figsize=figsize_ieee_double(0.40))
+        fig.text(0.5, 0.5, "no data", ha="center", va="center")
+        save_plate(fig, figdir, dpi, formats)
+        return
+
     ch_order = ["mini", "mid", "rich"]
-    df_proj["friendly"] = pd.Categorical(df_proj["friendly"], categories=ch_order, ordered=True)
-    df_proj.sort_values(["friendly", "tx_count"], inplace=True)
+    # (channel x tx_count) tables, one per panel; reindex fixes the bar order
+    pt_bw, pt_rt = (
+        df_proj.pivot_table(values=col, index="friendly", columns="tx_count", aggfunc="mean")
+               .reindex(index=ch_order, columns=COUNTS)
+        for col in ("bandwidth_MB", "runtime_min")
+    )
 
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=figsize_ieee_double(0.40))
     x = np.arange(len(COUNTS))
     width = 0.24
+    # rows = channels (GRAY/HATCH order), cols = tx counts
+    pos = x + (np.arange(len(ch_order)) - 1)[:, None] * width
+    bw, rt = pt_bw.to_numpy(), pt_rt.to_numpy()
 
     # Panel A: bandwidth (MB)
-    for i, ch in enumerate(ch_order):
-        sub = df_proj[df_proj["friendly"] == ch]
-        y = [sub[sub["tx_count"] == c]["bandwidth_MB"].mean() for c in COUNTS]
-        ax1.bar(x + (i - 1) * width, y, width,
-                color=GRAY[i % len(GRAY)],
-                hatch=HATCH[i % len(HATCH)],
-                edgecolor="black", linewidth=0.5,
-                label=ch)
+    handles = [hatched_bars(ax1, pos[i], bw[i], width, label=ch, facecolor=GRAY[i],
+                            hatch=HATCH[i], edgecolor="black", linewidth=0.5)
+               for i, ch in enumerate(ch_order)]
     ax1.set_xticks(x)
     ax1.set_xticklabels([str(c) for c in COUNTS])
     ax1.set_xlabel("Transactions")
     ax1.set_ylabel("Total bandwidth (MB)")
     ax1.set_title("Peer NET I/O for batched PIRQuery")
     ax1.grid(axis="y", linestyle=":", linewidth=0.6, alpha=0.6)
-    ax1.legend(ncol=1, frameon=True, loc="upper left", bbox_to_anchor=(0.0, 1.02))
+    ax1.legend(handles=handles, ncol=1, frameon=True, loc="upper left", bbox_to_anchor=(0.0, 1.02))
 
     # Panel B: runtime (minutes)
-    for i, ch in enumerate(ch_order):
-        sub = df_proj[df_proj["friendly"] == ch]
-        y = [sub[sub["tx_count"] == c]["runtime_min"].mean() for c in COUNTS]
-        ax2.bar(x + (i - 1) * width, y, width,
-                color=GRAY[i % len(GRAY)],
-                hatch=HATCH[i % len(HATCH)],
-                edgecolor="black", linewidth=0.5)
+    for i in range(len(ch_order)):
+        hatched_bars(ax2, pos[i], rt[i], width, facecolor=GRAY[i],
+                     hatch=HATCH[i], edgecolor="black", linewidth=0.5)
     ax2.set_xticks(x)
     ax2.set_xticklabels([str(c) for c in COUNTS])
     ax2.set_xlabel("Transactions")
@@ -121,12 +134,16 @@ def plot_plate(df_proj: pd.DataFrame, figdir: str, dpi: int):
     ax2.grid(axis="y", linestyle=":", linewidth=0.6, alpha=0.6)
 
     fig.tight_layout()
-    out_pdf = os.path.join(figdir, "pirquery_batch_cost_bw.pdf")
-    out_png = os.path.join(figdir, "pirquery_batch_cost_bw.png")
-    fig.savefig(out_pdf, bbox_inches="tight")
-    fig.savefig(out_png, dpi=dpi, bbox_inches="tight")
-    print(f"[OK] Wrote {out_pdf}")
-    print(f"[OK] Wrote {out_png}")
+    save_plate(fig, figdir, dpi, formats)
+
+def save_plate(fig, figdir: str, dpi: int, formats: str):
+    plt = pyplot()
+    for fmt in formats.split(","):
+        fmt = fmt.strip()
+        out = os.path.join(figdir, f"pirquery_batch_cost_bw.{fmt}")
+        fig.savefig(out, dpi=dpi if fmt == "png" else None, bbox_inches="tight")
+        print(f"[OK] Wrote {out}")
+    plt.close(fig)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -135,6 +152,7 @@ def main():
     ap.add_argument("--outdir", default="plots/tx_costs/figures", help="output directory for figures")
     ap.add_argument("--outcsv", default="plots/tx_costs/batch_projection.csv", help="output CSV for projections")
     ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--formats", default="pdf", help="comma-separated list: pdf,png")
     args = ap.parse_args()
 
     net_df = load_net(args.netcsv)
@@ -145,7 +163,7 @@ def main():
     proj.to_csv(args.outcsv, index=False)
     print(f"[OK] Wrote {args.outcsv}")
 
-    plot_plate(proj, args.outdir, args.dpi)
+    plot_plate(proj, args.outdir, args.dpi, args.formats)
 
 if __name__ == "__main__":
     main()